@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+##
+# Run the ClickBench benchmark against every datafusion-cli binary found in
+# builds/ (created by ensure_datafusion_cli.py) and write one CSV of timings
+# per revision into the output directory.
+##
+
+import argparse
+import collections
+import json
+import logging
+import os
+import shlex
+import subprocess
+
+STDERR_TAIL_LINES = 200
+
+logger = logging.getLogger(__name__)
+
+
+def run_clickbench_benchmark(binary_path, git_revision, git_revision_timestamp, output_dir):
+    """Run run_clickbench.py against one binary, streaming its output.
+
+    stdout is inherited so benchmark progress shows up live; only a bounded
+    tail of stderr is retained for error reporting.
+    """
+    cmd = ['python3', 'run_clickbench.py',
+           '--datafusion-binary', binary_path,
+           '--git-revision', git_revision,
+           '--git-revision-timestamp', git_revision_timestamp,
+           '--output-dir', output_dir]
+    # %s formatting (and shlex.join) only run if a handler renders the record
+    if logger.isEnabledFor(logging.INFO):
+        logger.info('Executing: %s', shlex.join(cmd))
+    proc = subprocess.Popen(cmd, stderr=subprocess.PIPE)
+    stderr_tail = collections.deque(maxlen=STDERR_TAIL_LINES)
+    for line in proc.stderr:
+        stderr_tail.append(line)
+    if proc.wait() != 0:
+        # stderr stays as bytes; only the failure path pays for decoding
+        tail = b''.join(stderr_tail).decode('utf-8', errors='replace')
+        print(f'Benchmark failed for {git_revision}:\n{tail}')
+        return False
+    print(f'Benchmark complete for {git_revision}')
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run ClickBench against all datafusion-cli builds')
+    parser.add_argument('--builds-dir', default='builds',
+                        help='Directory containing datafusion-cli binaries')
+    parser.add_argument('--output-dir', default='results',
+                        help='Directory for the result CSV files')
+    parser.add_argument('--quiet', action='store_true',
+                        help='Only log benchmark failures')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO,
+                        format='%(message)s')
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    # builds are recorded in the manifest by ensure_datafusion_cli.py, so
+    # there is no directory scan or binary-name parsing here
+    manifest = os.path.join(args.builds_dir, 'manifest.jsonl')
+    try:
+        with open(manifest) as f:
+            builds = [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        builds = []
+    if not builds:
+        print(f'No builds recorded in {manifest}')
+        return
+
+    # the manifest is append-only, so it can carry repeats for one commit
+    # (e.g. after a rebuild); benchmark each commit once
+    seen = set()
+    for build in sorted(builds, key=lambda b: b['timestamp']):
+        if build['commit'] in seen:
+            continue
+        seen.add(build['commit'])
+        binary_path = build['path']
+        try:
+            st = os.stat(binary_path)
+        except FileNotFoundError:
+            # recorded builds can be pruned from builds/ to save space
+            print(f'Skipping {build["commit"]}: {binary_path} no longer exists')
+            continue
+        # only chmod when the executable bit is actually missing
+        if not st.st_mode & 0o111:
+            os.chmod(binary_path, st.st_mode | 0o755)
+        run_clickbench_benchmark(binary_path, build['commit'],
+                                 build['timestamp'], args.output_dir)
+
+
+if __name__ == '__main__':
+    main()
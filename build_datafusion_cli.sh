@@ -0,0 +1,25 @@
+set -e
+##
+# Build datafusion-cli at a specific commit and copy the binary into the
+# builds directory, named datafusion-cli@{commit}@{timestamp}.
+#
+# Usage: build_datafusion_cli.sh <checkout_dir> <commit> <builds_dir> <timestamp>
+#
+# Invoked by ensure_datafusion_cli.py (one invocation per commit). The
+# commit timestamp is resolved by the caller in one batched git call.
+##
+
+CHECKOUT_DIR="$1"
+COMMIT="$2"
+BUILDS_DIR="$3"
+TIMESTAMP="$4"
+
+cd "${CHECKOUT_DIR}"
+# the checkout dir is a worktree of the primary repo; the objects were
+# already fetched there, and worktrees support independent detached HEADs
+git checkout --force --detach "${COMMIT}"
+
+cd datafusion-cli
+cargo build --release
+
+cp "target/release/datafusion-cli" "${BUILDS_DIR}/datafusion-cli@${COMMIT}@${TIMESTAMP}"
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+##
+# Ensure `datafusion-cli` binaries exist in builds/ for recent commits on
+# origin/main of a DataFusion checkout.
+#
+# Binaries are named builds/datafusion-cli@{commit}@{timestamp} so that
+# benchmark.py can discover them later. Builds run in parallel, each in its
+# own checkout directory cloned from --datafusion-dir.
+##
+
+import argparse
+import atexit
+import collections
+import fcntl
+import json
+import os
+import selectors
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BUILDS_DIR = 'builds'
+
+# append-only record of completed builds: one JSON object per line with
+# commit, timestamp and binary path, so consumers do not have to parse
+# binary filenames
+MANIFEST = os.path.join(BUILDS_DIR, 'manifest.jsonl')
+
+# cache of get_recent_commits results, keyed on the origin/main tip so a
+# cron loop re-running this script does not re-run git log when nothing
+# has changed
+COMMIT_CACHE = os.path.join(BUILDS_DIR, '.commit-cache.json')
+
+# Number of trailing stderr lines kept from a failed cargo build. Build logs
+# can run to hundreds of MB; only the tail is useful for error reporting.
+STDERR_TAIL_LINES = 200
+
+# seconds between progress lines during a build sweep
+PROGRESS_INTERVAL = 5
+
+# opened once and shared by every build subprocess, instead of
+# subprocess.DEVNULL re-opening /dev/null per spawn
+_DEVNULL_FD = os.open(os.devnull, os.O_WRONLY)
+atexit.register(os.close, _DEVNULL_FD)
+
+
+def get_recent_commits(datafusion_dir, days):
+    """Return commits on origin/main from the last `days` days, oldest first"""
+    tip = subprocess.run(
+        ['git', 'rev-parse', 'origin/main'],
+        cwd=datafusion_dir, capture_output=True, text=True, check=True).stdout.strip()
+    try:
+        with open(COMMIT_CACHE) as f:
+            cached = json.load(f)
+        if cached.get('tip') == tip and cached.get('days') == days:
+            return cached['commits']
+    except (OSError, ValueError):
+        pass
+
+    # rev-list is cheaper than log (no formatting machinery); the hashes
+    # are streamed line by line instead of materialized in one giant
+    # string. (rev-list only grew NUL termination in git 2.49, so
+    # newlines are the portable delimiter here.)
+    proc = subprocess.Popen(
+        ['git', 'rev-list', f'--since={days} days ago',
+         '--reverse', 'origin/main'],
+        cwd=datafusion_dir, stdout=subprocess.PIPE, text=True)
+    commits = [line.strip() for line in proc.stdout if line.strip()]
+    if proc.wait() != 0:
+        raise subprocess.CalledProcessError(proc.returncode, 'git rev-list')
+
+    os.makedirs(BUILDS_DIR, exist_ok=True)
+    with open(COMMIT_CACHE, 'w') as f:
+        json.dump({'tip': tip, 'days': days, 'commits': commits}, f)
+    return commits
+
+
+def check_existing_builds():
+    """Return the set of commits that already have a binary in builds/"""
+    try:
+        with open(MANIFEST) as f:
+            return {json.loads(line)['commit'] for line in f if line.strip()}
+    except OSError:
+        return set()
+
+
+def record_build(commit, timestamp, binary_path):
+    """Append a completed build to the manifest.
+
+    flock guards against concurrent script invocations appending at the
+    same time.
+    """
+    with open(MANIFEST, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.write(json.dumps({'commit': commit, 'timestamp': timestamp,
+                            'path': binary_path}) + '\n')
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def get_commit_timestamps(datafusion_dir, commits):
+    """Resolve commit timestamps, feeding all hashes through one git process.
+
+    One `git log --stdin` invocation amortizes git's startup cost
+    (config parsing, ref loading) over every commit, instead of the
+    build script paying it once per build.
+    """
+    if not commits:
+        return {}
+    proc = subprocess.Popen(
+        ['git', 'log', '--no-walk=unsorted', '--stdin', '--format=%H %cI'],
+        cwd=datafusion_dir, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        text=True)
+    out, _ = proc.communicate('\n'.join(commits) + '\n')
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, 'git log --stdin')
+    timestamps = {}
+    for line in out.splitlines():
+        commit, _, timestamp = line.partition(' ')
+        timestamps[commit] = timestamp
+    return timestamps
+
+
+def setup_datafusion_checkout(source_dir, checkout_dir):
+    """Add a worktree of source_dir at checkout_dir if it does not exist yet.
+
+    Worktrees share the primary repo's object database, so unlike a full
+    clone each extra checkout only costs a working tree.
+    """
+    if not os.path.exists(checkout_dir):
+        print(f'Adding worktree {checkout_dir} for {source_dir}')
+        subprocess.run(['git', 'worktree', 'add', '--detach', checkout_dir,
+                        'origin/main'], cwd=source_dir, check=True)
+
+
+def start_build(commit, checkout_dir, timestamp):
+    """Start building datafusion-cli for `commit` in `checkout_dir`.
+
+    The cargo build is streamed rather than captured: stdout goes to
+    /dev/null and the caller consumes stderr from the returned Popen,
+    keeping only a bounded tail, so a multi-minute build does not
+    accumulate its entire log in memory.
+    """
+    env = os.environ.copy()
+    # share compiled dependencies across the checkout dirs via sccache when
+    # it is installed. A single shared CARGO_TARGET_DIR would serialize the
+    # parallel builds under cargo's target-dir lock, so each dir keeps its
+    # own target/ (reused across commits) and sccache bridges between dirs.
+    sccache = shutil.which('sccache')
+    if sccache:
+        env['RUSTC_WRAPPER'] = sccache
+    # close_fds=False keeps CPython's subprocess on the posix_spawn/vfork
+    # fast path (no per-spawn fd-table walk, no COW page-table copy from a
+    # large parent). Nothing sensitive is held open here: the manifest is
+    # only opened transiently and the shared devnull fd is intentional.
+    return subprocess.Popen(
+        ['bash', 'build_datafusion_cli.sh', checkout_dir, commit,
+         os.path.abspath(BUILDS_DIR), timestamp],
+        stdout=_DEVNULL_FD, stderr=subprocess.PIPE, env=env, close_fds=False)
+
+
+def finish_build(proc, commit, timestamp, stderr_tail):
+    """Reap a finished build and record the result.
+
+    Failures are reported immediately; successes are only counted, with
+    progress printed periodically by the caller, so a sweep over many
+    commits does not emit several lines (= write syscalls) per build.
+    """
+    if proc.wait() == 0:
+        record_build(commit, timestamp, os.path.join(
+            BUILDS_DIR, f'datafusion-cli@{commit}@{timestamp}'))
+        return True
+    # stderr is kept as bytes and only decoded here, on the failure path
+    tail = b''.join(stderr_tail).decode('utf-8', errors='replace')
+    print(f'Failed to build {commit}:\n{tail}')
+    return False
+
+
+def run_builds(queue, checkout_dirs):
+    """Run the queued builds, one subprocess per checkout dir.
+
+    The build subprocesses do all the work, so rather than parking a
+    Python thread on each one we keep a single event loop: register each
+    build's stderr with a selector, collect the stderr tail as it
+    arrives, and start the next build for a dir when its current build's
+    stderr hits EOF. Commits are pulled from the shared queue as dirs
+    free up, so a fast dir keeps working instead of waiting on a fixed
+    round-robin share.
+    """
+    total = len(queue)
+    done = 0
+
+    # with a single checkout dir there is nothing to multiplex: run each
+    # build inline, which also keeps tracebacks straightforward
+    if len(checkout_dirs) == 1:
+        checkout_dir = checkout_dirs[0]
+        while queue:
+            commit, timestamp = queue.popleft()
+            proc = start_build(commit, checkout_dir, timestamp)
+            stderr_tail = collections.deque(maxlen=STDERR_TAIL_LINES)
+            for line in proc.stderr:
+                stderr_tail.append(line)
+            finish_build(proc, commit, timestamp, stderr_tail)
+            done += 1
+            print(f'{done}/{total} built')
+        return
+
+    sel = selectors.DefaultSelector()
+
+    def launch(checkout_dir):
+        if queue:
+            commit, timestamp = queue.popleft()
+            proc = start_build(commit, checkout_dir, timestamp)
+            stderr_tail = collections.deque(maxlen=STDERR_TAIL_LINES)
+            sel.register(proc.stderr, selectors.EVENT_READ,
+                         (proc, commit, timestamp, checkout_dir, stderr_tail))
+
+    for checkout_dir in checkout_dirs:
+        launch(checkout_dir)
+    last_status = time.monotonic()
+    while sel.get_map():
+        for key, _ in sel.select(timeout=PROGRESS_INTERVAL):
+            proc, commit, timestamp, checkout_dir, stderr_tail = key.data
+            line = key.fileobj.readline()
+            if line:
+                stderr_tail.append(line)
+                continue
+            # EOF: the build is done
+            sel.unregister(key.fileobj)
+            key.fileobj.close()
+            finish_build(proc, commit, timestamp, stderr_tail)
+            done += 1
+            launch(checkout_dir)
+        now = time.monotonic()
+        if now - last_status >= PROGRESS_INTERVAL:
+            print(f'{done}/{total} built, {len(sel.get_map())} running, '
+                  f'{len(queue)} queued')
+            last_status = now
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Build datafusion-cli for recent commits on origin/main')
+    parser.add_argument('--datafusion-dir', default=os.path.expanduser('~/arrow-datafusion'),
+                        help='Path to the primary DataFusion checkout')
+    parser.add_argument('--days', type=int, default=7,
+                        help='Build commits from the last DAYS days')
+    parser.add_argument('--num-builds', type=int, default=3,
+                        help='Number of parallel builds (and checkout dirs)')
+    args = parser.parse_args()
+
+    # cargo builds are RAM-heavy (~2 GB per concurrent rustc); clamp the
+    # parallelism so an over-eager --num-builds doesn't thrash swap
+    mem_gb = os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') // 1024**3
+    cap = min(os.cpu_count() or 2, max(1, mem_gb // 2))
+    if args.num_builds > cap:
+        print(f'Clamping --num-builds from {args.num_builds} to {cap} '
+              f'({os.cpu_count()} cpus, {mem_gb} GB RAM)')
+        args.num_builds = cap
+
+    subprocess.run(['git', 'fetch', 'origin'], cwd=args.datafusion_dir, check=True)
+
+    # both are I/O bound (git vs manifest read); overlap them
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        fut_commits = executor.submit(get_recent_commits, args.datafusion_dir, args.days)
+        fut_builds = executor.submit(check_existing_builds)
+        commits, existing = fut_commits.result(), fut_builds.result()
+    commits_to_build = [c for c in commits if c not in existing]
+    print(f'{len(commits)} commits in the last {args.days} days, '
+          f'{len(commits_to_build)} still to build')
+    if not commits_to_build:
+        return
+
+    os.makedirs(BUILDS_DIR, exist_ok=True)
+    # no point in more checkout dirs than commits to build
+    num_dirs = min(args.num_builds, len(commits_to_build))
+    checkout_dirs = [f'{args.datafusion_dir}-build-{i}' for i in range(num_dirs)]
+    for checkout_dir in checkout_dirs:
+        setup_datafusion_checkout(args.datafusion_dir, checkout_dir)
+
+    timestamps = get_commit_timestamps(args.datafusion_dir, commits_to_build)
+    queue = collections.deque(
+        (commit, timestamps[commit]) for commit in commits_to_build)
+    run_builds(queue, checkout_dirs)
+
+
+if __name__ == '__main__':
+    main()
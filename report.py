@@ -0,0 +1,582 @@
+#!/usr/bin/env python3
+##
+# Generate a static HTML report (index.html) from the ClickBench result
+# CSVs written by run_clickbench.py. DataFusion crunches the numbers and
+# the charts are rendered client-side with Plotly.
+#
+# releases.json / events.json (optional) mark DataFusion releases and other
+# noteworthy events as vertical lines on the charts.
+##
+
+import argparse
+import base64
+import dataclasses
+import datetime
+import functools
+import glob
+import gzip
+import json
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pacsv
+from datafusion import SessionContext
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ISO timestamps as Plotly expects them on the x axis. No %f: Arrow's
+# strftime does not support it (its %S already carries the fractional
+# part when the values have one)
+TS_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+# cap on points embedded per trace; beyond this the series is downsampled
+# so the page payload and render time stay O(pixels), not O(revisions)
+MAX_POINTS_PER_TRACE = 2000
+
+RELEASES_FILE = 'releases.json'
+EVENTS_FILE = 'events.json'
+
+# one template shared by every trace; meta[0] carries the metric name and
+# meta[1] the unit suffix, so the per-query chart does not repeat a
+# ~150-byte f-string once per trace in the JSON
+HOVER_TEMPLATE = ('<b>%{meta[0]}</b><br>%{y:.3f}%{meta[1]}<br>%{x}<br>'
+                  'revision %{customdata}<extra></extra>')
+
+# styling shared by every trace, merged in once per trace in Trace.to_dict
+BASE_TRACE = {
+    'mode': 'lines+markers',
+    # scattergl renders on the GPU instead of one SVG DOM node per marker
+    'type': 'scattergl',
+    'hovertemplate': HOVER_TEMPLATE,
+}
+
+
+@dataclasses.dataclass(slots=True)
+class Trace:
+    """The per-trace payload; everything static lives in BASE_TRACE"""
+    x: dict
+    y: dict
+    customdata: dict
+    name: str
+    meta: list
+
+    def to_dict(self):
+        return {'x': self.x, 'y': self.y, 'customdata': self.customdata,
+                'name': self.name, 'meta': self.meta, **BASE_TRACE}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate an HTML report from ClickBench result CSVs')
+    parser.add_argument('--results-dir', default='results',
+                        help='Directory containing the result CSV files')
+    parser.add_argument('--output-dir', default='.',
+                        help='Directory to write index.html into')
+    args = parser.parse_args()
+
+    csv_pattern = os.path.join(args.results_dir, '*.csv')
+    csv_files = sorted(glob.glob(csv_pattern))
+    if not csv_files:
+        print(f'No result files matching {csv_pattern}')
+        return
+
+    ctx = SessionContext()
+    # A fixed schema skips the schema-inference pass that would otherwise
+    # read the head of every CSV before parsing it for real.
+    schema = pa.schema([
+        ('benchmark_name', pa.string()),
+        ('query_name', pa.string()),
+        ('query_type', pa.string()),
+        ('execution_time', pa.float64()),
+        ('run_timestamp', pa.string()),
+        ('git_revision', pa.string()),
+        ('git_revision_timestamp', pa.timestamp('us', tz='UTC')),
+        ('num_cores', pa.int64()),
+    ])
+    # One small CSV per benchmark run: parse them concurrently. pyarrow's
+    # CSV reader releases the GIL, so a thread pool scales the ingest with
+    # core count instead of reading the shards one after another.
+    convert_options = pacsv.ConvertOptions(
+        column_types={field.name: field.type for field in schema})
+    with ThreadPoolExecutor() as executor:
+        tables = list(executor.map(
+            lambda path: pacsv.read_csv(path, convert_options=convert_options),
+            csv_files))
+    combined = pa.concat_tables(tables)
+    ctx.register_table('benchmark_results', ctx.from_arrow(combined))
+
+    # Project the columns the report actually reads and filter to benchmark
+    # queries once, then cache: every report query re-used this scan, so
+    # this collapses N passes over the CSVs into one.
+    cached = ctx.sql("""
+        SELECT benchmark_name, query_name, execution_time,
+               git_revision, git_revision_timestamp
+        FROM benchmark_results
+        WHERE query_type = 'query'
+    """).cache()
+    ctx.register_table('queries_only', cached)
+
+    report_path = os.path.join(args.output_dir, 'index.html')
+    generate_report(ctx, report_path)
+    print(f'Wrote {report_path}')
+
+
+@functools.lru_cache(maxsize=8)
+def _load_json(path, mtime):
+    """Parse a JSON file, cached on (path, mtime).
+
+    The mtime in the cache key means repeated calls cost a stat rather
+    than a re-parse, while an edited file is still picked up.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _load_metadata(path):
+    try:
+        return _load_json(path, os.path.getmtime(path))
+    except OSError:
+        return []
+
+
+def _load_releases():
+    return _load_metadata(RELEASES_FILE)
+
+
+def _load_events():
+    return _load_metadata(EVENTS_FILE)
+
+
+# the page footer is static: chart rendering and filtering logic. The
+# dropdown views are pre-sliced server-side (see _view_tables), so
+# switching filters is a dictionary lookup plus a Plotly.react diff —
+# no per-point loop runs on the browser main thread.
+_REPORT_SCRIPT = """function decodeTraces(byView) {
+  var ctors = {float64: Float64Array, uint16: Uint16Array};
+  Object.keys(byView).forEach(function(view) {
+    byView[view].forEach(function(trace) {
+      ['x', 'y', 'customdata'].forEach(function(field) {
+        var v = trace[field];
+        if (v && v.bdata) {
+          var bytes = Uint8Array.from(atob(v.bdata),
+                                      function(c) { return c.charCodeAt(0); });
+          trace[field] = new ctors[v.dtype](bytes.buffer);
+        }
+      });
+      if (trace.customdata) {
+        trace.customdata = Array.from(trace.customdata, function(i) {
+          return chartData.revision_dict[i];
+        });
+      }
+    });
+  });
+}
+decodeTraces(chartData.performance.by_view);
+decodeTraces(chartData.queries.by_view);
+
+function applyFilter(chart) {
+  var filter = document.getElementById('filter').value;
+  return chart.by_view[filter] || chart.by_view.all;
+}
+
+function activeOverlays() {
+  var hide = {
+    release: !document.getElementById('show_releases').checked,
+    event: !document.getElementById('show_events').checked
+  };
+  var keep = function(o) { return !hide[o.meta]; };
+  return {shapes: chartData.overlays.shapes.filter(keep),
+          annotations: chartData.overlays.annotations.filter(keep)};
+}
+
+function layoutWithOverlays(layout) {
+  return Object.assign({}, layout, activeOverlays());
+}
+
+function updateCharts() {
+  Plotly.react('performance_chart', applyFilter(chartData.performance),
+               layoutWithOverlays(chartData.performance.layout));
+  Plotly.react('queries_chart', applyFilter(chartData.queries),
+               layoutWithOverlays(chartData.queries.layout));
+}
+
+updateCharts();
+</script>
+</body>
+</html>
+"""
+
+
+def generate_report(ctx, report_path):
+    overall_stats_query = """
+        SELECT COUNT(*) AS num_results,
+               COUNT(DISTINCT git_revision) AS num_revisions,
+               MIN(git_revision_timestamp) AS first_revision,
+               MAX(git_revision_timestamp) AS last_revision
+        FROM queries_only
+    """
+    stats = _collect_table(ctx.sql(overall_stats_query))
+    num_results = stats.column('num_results')[0].as_py()
+    num_revisions = stats.column('num_revisions')[0].as_py()
+    first_revision = stats.column('first_revision')[0].as_py()
+    last_revision = stats.column('last_revision')[0].as_py()
+
+    chart_htmls = prepare_chart_data(ctx)
+
+    # The chart payload is mostly repetitive floats and shas; gzip shrinks
+    # it 5-10x, and since GitHub Pages serves the file without
+    # Content-Encoding, inlining the compressed bytes (base64) is the only
+    # way the wire size benefits. The page inflates it with pako.
+    with open(report_path, 'w') as f:
+        f.write(f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>DataFusion Benchmark Results</title>
+<script src="https://cdn.plot.ly/plotly-2.27.0.min.js"></script>
+<script src="https://cdn.jsdelivr.net/npm/pako@2.1.0/dist/pako.min.js"></script>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+.chart {{ width: 100%; height: 600px; }}
+</style>
+</head>
+<body>
+<h1>DataFusion ClickBench results</h1>
+<p>{num_results} results over {num_revisions} revisions
+({first_revision} &mdash; {last_revision})</p>
+<select id="filter" onchange="updateCharts()">
+  <option value="all">All revisions</option>
+  <option value="releases_vs_main">Releases vs main</option>
+  <option value="last_week">Last week</option>
+  <option value="last_3_months">Last 3 months</option>
+  <option value="last_6_months">Last 6 months</option>
+</select>
+<label><input type="checkbox" id="show_releases" checked
+onchange="updateCharts()"> release lines</label>
+<label><input type="checkbox" id="show_events" checked
+onchange="updateCharts()"> event lines</label>
+<div id="performance_chart" class="chart"></div>
+<div id="queries_chart" class="chart"></div>
+<script>
+var chartDataB64 = """)
+        payload = gzip.compress(_json_bytes(chart_htmls['chart_data']),
+                                compresslevel=9)
+        f.write(json.dumps(base64.b64encode(payload).decode('ascii')))
+        f.write(""";
+var chartData = JSON.parse(pako.inflate(
+    Uint8Array.from(atob(chartDataB64), function(c) { return c.charCodeAt(0); }),
+    {to: 'string'}));
+
+""" + _REPORT_SCRIPT)
+
+
+def _json_bytes(obj):
+    """Serialize obj to JSON bytes with orjson (SIMD encoder) when available.
+
+    orjson also serializes numpy arrays natively, so columns do not need
+    a .tolist() copy first.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+def _collect_table(df):
+    """Collect a DataFusion DataFrame into a single pyarrow Table.
+
+    Results stay in Arrow throughout: converting to pandas would copy
+    every column into BlockManager storage and re-parse the timestamps
+    the engine already returns as typed columns.
+    """
+    return pa.Table.from_batches(df.collect())
+
+
+def _with_ts_cols(table):
+    """Append ts_str (used by the overlays) and ts_ms (epoch milliseconds).
+
+    Trace x values are emitted as epoch-ms integers: Plotly accepts them
+    on a date axis and they are ~4x smaller in JSON than ISO strings.
+    Both conversions are single C kernels over the whole column.
+    """
+    ts = table.column('git_revision_timestamp')
+    table = table.append_column(
+        'ts_str', pc.strftime(ts, format=TS_FORMAT))
+    return table.append_column(
+        'ts_ms', pc.divide(pc.cast(ts, pa.int64()), 1000))
+
+
+def prepare_chart_data(ctx):
+    # the per-query chart aggregates raw timings, no normalization needed
+    queries_table = _collect_table(ctx.sql("""
+        SELECT git_revision, git_revision_timestamp, query_name,
+               MEDIAN(execution_time) AS median_time
+        FROM queries_only
+        GROUP BY git_revision, git_revision_timestamp, query_name
+        ORDER BY git_revision_timestamp
+    """))
+
+    # Normalize each timing against the best time seen for that query (the
+    # 0.01 offsets keep sub-ms queries from dominating the ratios). Once
+    # the query names are dictionary-encoded this is a min-reduction plus
+    # one vectorized divide over contiguous float64 arrays — no need to
+    # push a self-join through the planner.
+    raw = _collect_table(ctx.sql("""
+        SELECT query_name, execution_time, git_revision, git_revision_timestamp
+        FROM queries_only
+    """))
+    encoded = raw.column('query_name').combine_chunks().dictionary_encode()
+    codes = encoded.indices.to_numpy()
+    execution_time = raw.column('execution_time').to_numpy()
+    baselines = np.full(len(encoded.dictionary), np.inf)
+    np.minimum.at(baselines, codes, execution_time)
+    normalized = (0.01 + execution_time) / (0.01 + baselines[codes])
+    raw = raw.append_column('normalized_time', pa.array(normalized))
+
+    grouped = pa.TableGroupBy(
+        raw, ['git_revision', 'git_revision_timestamp']).aggregate(
+        [('normalized_time', 'mean')])
+    performance_table = pa.table({
+        'git_revision': grouped.column('git_revision'),
+        'git_revision_timestamp': grouped.column('git_revision_timestamp'),
+        'avg_time': grouped.column('normalized_time_mean'),
+    }).sort_by('git_revision_timestamp')
+
+    # Dictionary-encode revisions in the payload: customdata carries small
+    # integers and the page decodes them through revision_dict, instead of
+    # repeating a 40-char sha once per point per trace.
+    revisions = sorted(set(queries_table.column('git_revision').to_pylist()))
+    rev_idx = {revision: i for i, revision in enumerate(revisions)}
+
+    # materialize the formatted/epoch-ms timestamp columns once per table;
+    # the rev map and the chart builders all reuse them
+    queries_table = _with_ts_cols(queries_table)
+    performance_table = _with_ts_cols(performance_table)
+
+    # the release/event lines are identical on both charts: build them once
+    # and emit one shared copy that the page merges into each layout
+    shapes, annotations = _build_revision_overlays(_rev_to_ts_str(queries_table))
+
+    return {'chart_data': {
+        'performance': _build_chart(
+            performance_table, _performance_traces, rev_idx,
+            title='Average normalized query time by revision',
+            y_title='normalized time (lower is better)'),
+        'queries': _build_chart(
+            queries_table, _query_traces, rev_idx,
+            title='Median query time by revision',
+            y_title='median time (seconds)'),
+        'overlays': {'shapes': shapes, 'annotations': annotations},
+        'revision_dict': revisions,
+    }}
+
+
+def _lttb_indices(y, n_out):
+    """Largest-triangle-three-buckets downsampling over evenly spaced x.
+
+    Returns the indices of the points to keep (always including the first
+    and last); the selection preserves the visual shape of the series.
+    """
+    n = len(y)
+    if n <= n_out:
+        return range(n)
+    y = np.asarray(y, dtype=float)
+    x = np.arange(n, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    indices = np.empty(n_out, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        if i + 2 < n_out - 1:
+            next_lo, next_hi = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+        else:
+            next_lo, next_hi = edges[i + 1], n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        # largest triangle between the previously kept point, a candidate
+        # in this bucket, and the next bucket's average
+        areas = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a])
+                       - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(areas))
+        indices[i + 1] = a
+    return indices
+
+
+def _downsample(x, y, customdata):
+    """Cap a trace at MAX_POINTS_PER_TRACE points via LTTB"""
+    keep = _lttb_indices(y, MAX_POINTS_PER_TRACE)
+    if len(keep) == len(y):
+        return x, y, customdata
+    keep = np.asarray(keep)
+    return x[keep], y[keep], customdata[keep]
+
+
+def _typed(values, dtype):
+    """Encode a numeric array as Plotly's {dtype, bdata} typed-array form.
+
+    The page reconstructs a TypedArray from the base64 bytes, so trace
+    columns live as contiguous buffers (8 bytes per float64) instead of
+    arrays of boxed JS Numbers (~16 bytes each plus GC pressure).
+    """
+    arr = np.ascontiguousarray(values, dtype=dtype)
+    return {'dtype': arr.dtype.name,
+            'bdata': base64.b64encode(arr.tobytes()).decode('ascii')}
+
+
+def _view_tables(table):
+    """Pre-slice a chart table into the dropdown's filter views.
+
+    The browser used to re-filter every trace point-by-point on each
+    dropdown change; doing it here is one vectorized filter kernel per
+    view, and the page just indexes into the result.
+    """
+    ts = table.column('git_revision_timestamp')
+    # the explicit type matters: with no releases.json the list is empty
+    # and an untyped pa.array would come out null, which is_in rejects
+    releases = pa.array([item['revision'] for item in _load_releases()],
+                        pa.string())
+    now = datetime.datetime.now(datetime.timezone.utc)
+    views = {
+        'all': table,
+        'releases_vs_main': table.filter(
+            pc.is_in(table.column('git_revision'), value_set=releases)),
+    }
+    for view, days in (('last_week', 7), ('last_3_months', 90),
+                       ('last_6_months', 180)):
+        cutoff = now - datetime.timedelta(days=days)
+        views[view] = table.filter(pc.greater_equal(ts, pa.scalar(cutoff)))
+    return views
+
+
+def _rev_to_ts_str(table):
+    """Map each git_revision to its (earliest) formatted timestamp"""
+    grouped = pa.TableGroupBy(
+        table.select(['git_revision', 'ts_str']), 'git_revision').aggregate(
+        [('ts_str', 'min')])
+    return dict(zip(grouped.column('git_revision').to_pylist(),
+                    grouped.column('ts_str_min').to_pylist()))
+
+
+# Prebuilt marker templates: the overlay loop shallow-copies one of these
+# and fills in the x coordinate, rather than allocating a fresh nested dict
+# literal per revision. The shared line/font dicts are safe because the
+# overlays are only ever serialized, never mutated.
+_SHAPE_TPL = {
+    kind: {'type': 'line', 'meta': kind, 'y0': 0, 'y1': 1, 'yref': 'paper',
+           'line': {'color': color, 'width': 1, 'dash': 'dot'}}
+    for kind, color in (('release', 'green'), ('event', 'orange'))
+}
+_ANNO_TPL = {
+    kind: {'meta': kind, 'y': 1, 'yref': 'paper', 'showarrow': False,
+           'yanchor': 'bottom', 'font': {'size': 10, 'color': color}}
+    for kind, color in (('release', 'green'), ('event', 'orange'))
+}
+
+
+def _build_revision_overlays(rev_to_ts_str):
+    """Build the release/event vertical lines and their labels"""
+    shapes = []
+    annotations = []
+    for kind, items in (('release', _load_releases()),
+                        ('event', _load_events())):
+        shape_tpl, anno_tpl = _SHAPE_TPL[kind], _ANNO_TPL[kind]
+        for item in items:
+            revision = item.get('revision')
+            if revision not in rev_to_ts_str:
+                continue
+            ts_str = rev_to_ts_str[revision]
+            shape = shape_tpl.copy()
+            shape['x0'] = shape['x1'] = ts_str
+            shapes.append(shape)
+            anno = anno_tpl.copy()
+            anno['x'] = ts_str
+            anno['text'] = item.get('label', revision[:7])
+            annotations.append(anno)
+    return shapes, annotations
+
+
+def _performance_traces(table, rev_idx):
+    x, y, customdata = _downsample(
+        table.column('ts_ms').to_numpy(),
+        table.column('avg_time').to_numpy(),
+        # uint16 caps the dictionary at 65k revisions — years of headroom
+        np.fromiter((rev_idx[r]
+                     for r in table.column('git_revision').to_pylist()),
+                    dtype=np.uint16, count=len(table)))
+    return [Trace(x=_typed(x, np.float64),
+                  y=_typed(y, np.float64),
+                  customdata=_typed(customdata, np.uint16),
+                  name='average normalized time',
+                  meta=['Average Normalized Time', '']).to_dict()]
+
+
+def _build_chart(table, traces_fn, rev_idx, title, y_title):
+    """Build one chart: traces per filter view plus the layout.
+
+    `table` must already carry the ts_str/ts_ms columns (see
+    prepare_chart_data); `traces_fn` turns one view's table into its
+    trace list.
+    """
+    by_view = {view: traces_fn(view_table, rev_idx)
+               for view, view_table in _view_tables(table).items()}
+    layout = {
+        'title': title,
+        'xaxis': {'title': 'revision date', 'type': 'date'},
+        'yaxis': {'title': y_title},
+    }
+    return {'by_view': by_view, 'layout': layout}
+
+
+def _query_traces(table, rev_idx):
+    # a view can be empty (e.g. last_week with no recent runs); the
+    # boundary scan below would still yield one bogus group for it
+    if len(table) == 0:
+        return []
+    # sort once so each query's rows are contiguous, then slice per group:
+    # one O(N log N) pass instead of an O(N) filter scan per query
+    table = table.sort_by([('query_name', 'ascending'),
+                           ('git_revision_timestamp', 'ascending')])
+    encoded = table.column('query_name').combine_chunks().dictionary_encode()
+    codes = encoded.indices.to_numpy()
+    # group boundaries fall where consecutive dictionary codes differ: one
+    # vectorized comparison instead of a Python scan over the name strings
+    group_starts = np.concatenate(
+        ([0], np.nonzero(codes[1:] != codes[:-1])[0] + 1, [len(codes)]))
+    dictionary = encoded.dictionary.to_pylist()
+
+    # mean median_time per query via bincount on the codes: one pass over
+    # the column, no group-by machinery. Used to put the slowest queries
+    # first in the legend.
+    sums = np.bincount(codes, weights=table.column('median_time').to_numpy())
+    mean_order = np.argsort(sums / np.bincount(codes))[::-1]
+
+    traces = []
+    for start, end in zip(group_starts, group_starts[1:]):
+        query_name = dictionary[codes[start]]
+        query_data = table.slice(start, end - start)
+        x, y, customdata = _downsample(
+            query_data.column('ts_ms').to_numpy(),
+            query_data.column('median_time').to_numpy(),
+            np.fromiter((rev_idx[r]
+                         for r in query_data.column('git_revision').to_pylist()),
+                        dtype=np.uint16, count=end - start))
+        traces.append(Trace(x=_typed(x, np.float64),
+                            y=_typed(y, np.float64),
+                            customdata=_typed(customdata, np.uint16),
+                            name=query_name,
+                            meta=[f'Median {query_name} Time', 's']).to_dict())
+    # the column was sorted by name, so group i carries dictionary code i
+    # and traces can be reordered by indexing
+    return [traces[i] for i in mean_order]
+
+
+if __name__ == '__main__':
+    main()
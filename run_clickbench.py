@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+##
+# Run the ClickBench queries against a single datafusion-cli binary and
+# append the timings to a CSV in the output directory.
+#
+# Expects the ClickBench data (hits.parquet) and queries (queries.sql, one
+# query per line) in the current directory; both come from
+# https://github.com/ClickHouse/ClickBench and are not checked in.
+##
+
+import argparse
+import csv
+import datetime
+import os
+import re
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+NUM_QUERIES = 43
+
+# datafusion-cli prints e.g. "Elapsed 1.234 seconds."
+_ELAPSED = re.compile(r'Elapsed\s+([0-9.]+)\s+seconds')
+
+# sentinel rows emitted between query blocks by run_all_queries
+_SENTINEL = re.compile(r'===(q\d+)===')
+
+# result CSV column order; fixed so the writer can be created up front
+COLUMNS = ['benchmark_name', 'query_name', 'query_type', 'execution_time',
+           'run_timestamp', 'git_revision', 'git_revision_timestamp',
+           'num_cores']
+
+CREATE_TABLE = "CREATE EXTERNAL TABLE hits STORED AS PARQUET LOCATION 'hits.parquet';"
+
+script_start_timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+# constant for the lifetime of the run; avoids a sysconf call per result row
+_NUM_CORES = os.cpu_count()
+
+
+def read_queries(queries_file):
+    """Read the ClickBench queries, one per line"""
+    with open(queries_file) as f:
+        queries = [line.strip() for line in f if line.strip()]
+    if len(queries) != NUM_QUERIES:
+        print(f'Warning: expected {NUM_QUERIES} queries in {queries_file}, '
+              f'found {len(queries)}')
+    return queries
+
+
+def make_results(query_name, timings, args):
+    """Build one result dict per timing for query_name"""
+    return [{
+        'benchmark_name': 'clickbench',
+        'query_name': query_name,
+        'query_type': 'query',
+        'execution_time': execution_time,
+        'run_timestamp': script_start_timestamp,
+        'git_revision': args.git_revision,
+        'git_revision_timestamp': args.git_revision_timestamp,
+        'num_cores': _NUM_CORES,
+    } for execution_time in timings]
+
+
+def run_clickbench_query(query_name, query, args):
+    """Run one query `num_runs` times, returning one result dict per run"""
+    os.makedirs('tmp', exist_ok=True)
+    # one script per query so parallel workers do not race on a shared file;
+    # each worker is a fresh datafusion-cli process, so the DDL is needed here
+    temp_script = f'tmp/script_{query_name}.sql'
+    with open(temp_script, 'w') as f:
+        f.write(CREATE_TABLE + '\n')
+        for _ in range(args.num_runs):
+            f.write(query + '\n')
+
+    print(f'Running {query_name}')
+    # stream stdout instead of buffering the whole query output (result
+    # rows included) in memory and re-scanning it afterwards
+    proc = subprocess.Popen([args.datafusion_binary, '-f', temp_script],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True)
+    timings = []
+    # the script opens with the CREATE EXTERNAL TABLE, whose Elapsed line
+    # is table registration, not a query timing; mirror run_all_queries'
+    # sentinel skip and drop the first match
+    skip_ddl_timing = True
+    for line in proc.stdout:
+        m = _ELAPSED.search(line)
+        if m:
+            if skip_ddl_timing:
+                skip_ddl_timing = False
+            else:
+                timings.append(float(m.group(1)))
+    _, stderr = proc.communicate()
+    if proc.returncode != 0:
+        print(f'{query_name} failed:\n{stderr}')
+        return []
+    return make_results(query_name, timings, args)
+
+
+def run_all_queries(pending, args, record):
+    """Run the pending queries in a single datafusion-cli session.
+
+    One invocation means the CREATE EXTERNAL TABLE is parsed and
+    registered once instead of once per query, and the cli startup cost
+    is paid once. A sentinel SELECT between query blocks delimits each
+    query's output; a query's rows are handed to `record` as soon as
+    the next sentinel streams past, so a crash mid-run loses at most
+    the in-flight query.
+    """
+    os.makedirs('tmp', exist_ok=True)
+    temp_script = 'tmp/all.sql'
+    with open(temp_script, 'w') as f:
+        f.write(CREATE_TABLE + '\n')
+        for query_name, query in pending:
+            f.write(f"SELECT '==={query_name}===';\n")
+            for _ in range(args.num_runs):
+                f.write(query + '\n')
+
+    print(f'Running {len(pending)} queries in one session')
+    proc = subprocess.Popen([args.datafusion_binary, '-f', temp_script],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True)
+    # A sentinel row switches the current query; the first Elapsed line
+    # after it belongs to the sentinel SELECT itself, so it is skipped.
+    # Lines before the first sentinel are the DDL output.
+    current = None
+    timings = []
+    skip_sentinel_timing = False
+    for line in proc.stdout:
+        m = _SENTINEL.search(line)
+        if m:
+            if current is not None:
+                record(make_results(current, timings, args))
+            current = m.group(1)
+            timings = []
+            skip_sentinel_timing = True
+            continue
+        m = _ELAPSED.search(line)
+        if m and current is not None:
+            if skip_sentinel_timing:
+                skip_sentinel_timing = False
+            else:
+                timings.append(float(m.group(1)))
+    _, stderr = proc.communicate()
+    if proc.returncode != 0:
+        print(f'Benchmark failed:\n{stderr}')
+        return
+    if current is not None:
+        record(make_results(current, timings, args))
+
+
+def load_completed_queries(output_file, git_revision):
+    """Return the query names already recorded for git_revision.
+
+    Lets an interrupted run resume where it stopped instead of
+    re-running hours of already-recorded queries.
+    """
+    try:
+        with open(output_file, newline='') as f:
+            return {row['query_name'] for row in csv.DictReader(f)
+                    if row['git_revision'] == git_revision}
+    except OSError:
+        return set()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run ClickBench against a datafusion-cli binary')
+    parser.add_argument('--datafusion-binary', required=True,
+                        help='Path to the datafusion-cli binary to benchmark')
+    parser.add_argument('--git-revision', required=True,
+                        help='Git revision of the binary (recorded in results)')
+    parser.add_argument('--git-revision-timestamp', required=True,
+                        help='Commit timestamp of the revision')
+    parser.add_argument('--output-dir', default='results',
+                        help='Directory for the result CSV')
+    parser.add_argument('--queries-file', default='queries.sql',
+                        help='File containing the ClickBench queries')
+    parser.add_argument('--num-runs', type=int, default=5,
+                        help='Times to run each query')
+    parser.add_argument('--parallelism', type=int, default=1,
+                        help='Queries to run concurrently. The default of 1 '
+                             'keeps queries isolated for stable timings; '
+                             'higher values trade that for wall-clock time')
+    args = parser.parse_args()
+
+    output_file = os.path.join(args.output_dir, f'clickbench-{args.git_revision}.csv')
+    done = load_completed_queries(output_file, args.git_revision)
+    queries = read_queries(args.queries_file)
+    pending = [(f'q{i}', query) for i, query in enumerate(queries)
+               if f'q{i}' not in done]
+    if not pending:
+        print(f'Results for {args.git_revision} already in {output_file}, skipping')
+        return
+    if done:
+        print(f'Resuming: {len(done)} queries already in {output_file}')
+
+    total = 0
+    write_header = not os.path.exists(output_file)
+    # rows are appended (and flushed) as each query finishes, so a crash
+    # or OOM kill late in a multi-hour run keeps everything recorded so far
+    with open(output_file, 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        if write_header:
+            writer.writeheader()
+
+        def record(results):
+            nonlocal total
+            writer.writerows(results)
+            f.flush()
+            total += len(results)
+
+        if args.parallelism > 1:
+            # each query is its own datafusion-cli subprocess with its own
+            # temp script, so query-level parallelism is embarrassingly
+            # parallel; rows are written here as workers finish
+            with ProcessPoolExecutor(max_workers=args.parallelism) as executor:
+                futures = [executor.submit(run_clickbench_query, query_name, query, args)
+                           for query_name, query in pending]
+                for future in as_completed(futures):
+                    record(future.result())
+        else:
+            run_all_queries(pending, args, record)
+    print(f'Wrote {total} results to {output_file}')
+
+
+if __name__ == '__main__':
+    main()
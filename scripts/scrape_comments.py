@@ -0,0 +1,623 @@
+#!/usr/bin/env python3
+##
+# Scan recent pull-request review comments on the configured repositories
+# for benchmark trigger comments ("run benchmarks" or "run benchmark
+# <names>"), queue a job script for each request under jobs/, and reply on
+# the PR so the requester knows it was picked up. "show benchmark queue"
+# gets a reply listing the queued jobs.
+#
+# Meant to run from cron. Uses the `gh` CLI for GitHub API access, so it
+# inherits gh's authentication.
+##
+
+import dataclasses
+import datetime
+import functools
+import hashlib
+import io
+import json
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+# orjson parses the UTF-8 payload bytes directly (no separate decode pass)
+# and is severalfold faster than stdlib json on GitHub-style payloads
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+API_ROOT = 'https://api.github.com'
+
+# how far back to look for trigger comments when there is no saved state
+TIME_WINDOW_SECONDS = 3600
+
+# per-repo polling state (last comment seen, whether the last fetch filled
+# a full page), so each sweep asks only for what it has not seen yet
+STATE_FILE = 'scrape_state.json'
+
+# re-fetch a little before last_seen to cover clock skew and comments
+# whose updated_at moved backwards between sweeps
+OVERLAP_SECONDS = 300
+
+# ceiling on how far back an idle repo's window can grow
+MAX_WINDOW_SECONDS = 86400
+
+# GitHub's maximum page size
+PER_PAGE = 100
+
+JOBS_DIR = 'jobs'
+
+# immutable by design: frozensets make that explicit and skip the
+# per-process set copies
+ALLOWED_BENCHMARKS = frozenset({'clickbench', 'tpch', 'tpch_mem', 'sort'})
+
+# sorted/joined once instead of per trigger comment
+_ALL_BENCHMARKS = sorted(ALLOWED_BENCHMARKS)
+_ALL_BENCHMARKS_TEXT = ', '.join(_ALL_BENCHMARKS)
+
+# comment author associations that are allowed to trigger benchmark runs
+ALLOWED_ASSOCIATIONS = frozenset({'OWNER', 'MEMBER', 'COLLABORATOR'})
+
+SCRIPT_MARKDOWN_LINK = (
+    '[scrape_comments.py](https://github.com/alamb/datafusion-benchmarking'
+    '/blob/main/scripts/scrape_comments.py)')
+
+# The trigger pattern, compiled once at module load rather than per
+# comment: a sweep matches it against every comment on every repo. One
+# alternation classifies "run benchmarks" (full set),
+# "run benchmark <names>" and "show benchmark queue" in a single
+# match call.
+_TRIGGER_RE = re.compile(
+    r'^\s*(?:(?P<queue>show\s+benchmark\s+queue)'
+    r'|run\s+benchmarks?(?:\s+(?P<names>[a-zA-Z0-9_][a-zA-Z0-9_\s]*?))?)\s*$',
+    re.IGNORECASE)
+
+# static query params, built once instead of per fetch; only `since`
+# changes between sweeps
+_COMMENTS_PARAMS_BASE = {'per_page': str(PER_PAGE),
+                         'sort': 'updated',
+                         'direction': 'desc'}
+_PER_PAGE_PARAMS = {'per_page': str(PER_PAGE)}
+
+# job-file metadata, all four fields in one multiline alternation so a
+# job script is parsed in a single regex pass; the matched group name
+# doubles as the metadata key
+_JOB_META_RE = re.compile(
+    r'^# User: (?P<user>.*)$'
+    r'|^# Comment: (?P<comment>.*)$'
+    r'|^PR_NUMBER="(?P<pr_number>[^"]+)"'
+    r'|^BENCHMARKS="(?P<benchmarks>[^"]+)"',
+    re.MULTILINE)
+
+# idempotency markers embedded in our own replies (see job_marker)
+_MARKER_RE = re.compile(r'<!--bm:[0-9a-f]+-->')
+
+
+@dataclasses.dataclass
+class RepoConfig:
+    """One repository to scan for trigger comments"""
+    name: str  # owner/repo
+
+
+def build_configs():
+    return [
+        RepoConfig(name='apache/datafusion'),
+        RepoConfig(name='apache/arrow-rs'),
+    ]
+
+
+# one authenticated HTTP session for the whole sweep: spawning a gh
+# subprocess per call paid fork/exec plus a fresh TLS handshake each time,
+# while a session reuses the connection across every request
+_session = None
+
+
+def _get_session():
+    global _session
+    if _session is None:
+        token = subprocess.check_output(['gh', 'auth', 'token'],
+                                        text=True).strip()
+        _session = requests.Session()
+        _session.headers.update({'Authorization': f'Bearer {token}',
+                                 'Accept': 'application/vnd.github+json'})
+    return _session
+
+
+def _run_gh_api_cli(path, params, paginate):
+    """gh-CLI fallback used when `requests` is not installed"""
+    cmd = ['gh', 'api', path]
+    if paginate:
+        # gh follows the Link headers and --slurp wraps the pages in one
+        # JSON array, flattened below
+        cmd.extend(['--paginate', '--slurp'])
+    for key, value in (params or {}).items():
+        cmd.extend(['-f', f'{key}={value}'])
+    # stdout stays bytes: the parser takes UTF-8 directly
+    result = subprocess.run(cmd, capture_output=True, check=True)
+    data = _json_loads(result.stdout)
+    if paginate:
+        return [item for page in data for item in page]
+    return data
+
+
+def run_gh_api(path, params=None, paginate=False):
+    """Call the GitHub API and return the parsed JSON.
+
+    With paginate=True the Link headers are followed and the pages'
+    items returned as one flat list.
+    """
+    if requests is None:
+        return _run_gh_api_cli(path, params, paginate)
+    session = _get_session()
+    url = f'{API_ROOT}/{path}'
+    items = []
+    while True:
+        response = session.get(url, params=params, timeout=30)
+        response.raise_for_status()
+        data = _json_loads(response.content)
+        if not paginate:
+            return data
+        items.extend(data)
+        # the next link carries its own query string
+        url = response.links.get('next', {}).get('url')
+        params = None
+        if not url:
+            return items
+
+
+def _graphql(query):
+    if requests is None:
+        result = subprocess.run(['gh', 'api', 'graphql', '-f', f'query={query}'],
+                                capture_output=True, check=True)
+        return _json_loads(result.stdout)
+    response = _get_session().post(f'{API_ROOT}/graphql',
+                                   json={'query': query}, timeout=30)
+    response.raise_for_status()
+    return _json_loads(response.content)
+
+
+def _load_state():
+    try:
+        with open(STATE_FILE, 'rb') as f:
+            return _json_loads(f.read())
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(state):
+    with open(STATE_FILE, 'w') as f:
+        json.dump(state, f)
+
+
+def _since_for(config, state):
+    """Pick the `since` cutoff for one repo's fetch.
+
+    With saved state the window starts just before the newest comment the
+    previous sweep saw, so runs in a quiet hour fetch (and spend quota on)
+    nothing. When the repo stays idle, last_seen does not advance and the
+    window widens on its own, capped at MAX_WINDOW_SECONDS; without state
+    it falls back to the fixed TIME_WINDOW_SECONDS.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    floor = now - datetime.timedelta(seconds=MAX_WINDOW_SECONDS)
+    last_seen = state.get(config.name, {}).get('last_seen')
+    if last_seen is None:
+        return now - datetime.timedelta(seconds=TIME_WINDOW_SECONDS)
+    since = (datetime.datetime.fromisoformat(last_seen)
+             - datetime.timedelta(seconds=OVERLAP_SECONDS))
+    return max(since, floor)
+
+
+def _conditional_get(path, params, etag):
+    """One GET with If-None-Match; returns (data, new_etag).
+
+    data is None on 304 Not Modified, which GitHub serves without
+    charging a rate-limit point — the common nothing-new sweep becomes
+    free. The gh fallback does not expose response headers, so it
+    always fetches and returns no etag.
+    """
+    if requests is None:
+        return _run_gh_api_cli(path, params, False), None
+    headers = {'If-None-Match': etag} if etag else None
+    response = _get_session().get(f'{API_ROOT}/{path}', params=params,
+                                  headers=headers, timeout=30)
+    if response.status_code == 304:
+        return None, etag
+    response.raise_for_status()
+    return _json_loads(response.content), response.headers.get('ETag')
+
+
+def _fetch_via_search(config, since_iso, state):
+    """Let the server narrow the fetch to PRs that mention the trigger.
+
+    One search query finds the PRs whose comments mention benchmarks
+    (covering both the run and show-queue triggers), and only those
+    PRs' review comments are downloaded — a handful of bodies instead
+    of every review comment in the window. The query is conditional on
+    the previous sweep's ETag: while the repo is idle, since does not
+    advance and the 304 response costs nothing.
+    """
+    query = (f'repo:{config.name} is:pr in:comments '
+             f'benchmark updated:>={since_iso}')
+    entry = state.setdefault(config.name, {})
+    result, etag = _conditional_get('search/issues',
+                                    {'q': query, 'per_page': str(PER_PAGE)},
+                                    entry.get('etag'))
+    if result is None:
+        return []
+    entry['etag'] = etag
+    comments = []
+    for item in result.get('items', []):
+        comments.extend(
+            comment for comment in run_gh_api(
+                f'repos/{config.name}/pulls/{item["number"]}/comments',
+                _PER_PAGE_PARAMS, paginate=True)
+            # ISO-8601 UTC strings compare correctly as strings
+            if comment['updated_at'] >= since_iso)
+    return comments
+
+
+def fetch_recent_review_comments(config, state):
+    """Fetch review comments updated since the repo's last sweep.
+
+    Tries the search API first so trigger filtering happens server
+    side; search has its own (lower) rate limit and stricter token
+    scopes, so any failure falls back to listing the whole window.
+    """
+    since = _since_for(config, state)
+    since_iso = since.strftime('%Y-%m-%dT%H:%M:%SZ')
+    try:
+        return _fetch_via_search(config, since_iso, state)
+    except Exception as exc:
+        print(f'{config.name}: comment search failed ({exc}), '
+              f'falling back to a full listing')
+    return run_gh_api(f'repos/{config.name}/pulls/comments',
+                      dict(_COMMENTS_PARAMS_BASE, since=since_iso),
+                      paginate=True)
+
+
+def fetch_issue_comments(config, issue_number):
+    """Fetch the issue comments on one PR (replies we may have posted)"""
+    return run_gh_api(f'repos/{config.name}/issues/{issue_number}/comments',
+                      _PER_PAGE_PARAMS, paginate=True)
+
+
+# (repo name, pr number) -> set of idempotency markers found in the PR's
+# issue comments. Extracting the markers once at fetch time turns every
+# already_posted call into an O(1) set lookup instead of a substring
+# scan over all the comment bodies.
+_posted_markers_cache = {}
+
+
+def prefetch_issue_comment_bodies(config, pr_numbers):
+    """Fill _posted_markers_cache for all PRs with one GraphQL round-trip.
+
+    One aliased query replaces a REST call (plus gh subprocess startup)
+    per distinct PR; the last 50 comments are plenty for the
+    idempotency-marker check.
+    """
+    if not pr_numbers:
+        return
+    owner, name = config.name.split('/')
+    fields = ' '.join(
+        f'pr{n}: pullRequest(number: {n}) '
+        '{ comments(last: 50) { nodes { body } } }'
+        for n in pr_numbers)
+    query = (f'query {{ repository(owner: "{owner}", name: "{name}") '
+             f'{{ {fields} }} }}')
+    repository = _graphql(query)['data']['repository']
+    for n in pr_numbers:
+        pr = repository.get(f'pr{n}') or {'comments': {'nodes': []}}
+        markers = set()
+        for node in pr['comments']['nodes']:
+            markers.update(_MARKER_RE.findall(node['body']))
+        _posted_markers_cache[(config.name, n)] = markers
+
+
+def classify_body(body):
+    """Classify a comment body in one regex pass.
+
+    Returns ('run', benchmarks) for a run trigger — the full allowed
+    set for "run benchmarks", the listed names (validated by the
+    caller) for "run benchmark a b" — ('queue', None) for a queue
+    listing request, and (None, None) for everything else.
+    """
+    # nearly every comment is not a trigger: one C-level substring check
+    # over the first few bytes skips the regex match for those
+    if 'benchmark' not in body[:64].lower():
+        return None, None
+    m = _TRIGGER_RE.match(body)
+    if not m:
+        return None, None
+    if m.group('queue') is not None:
+        return 'queue', None
+    names = m.group('names')
+    if names is None:
+        return 'run', _ALL_BENCHMARKS
+    return 'run', names.split()
+
+
+def already_posted(config, issue_number, marker):
+    """Return True if we already replied on this PR with `marker`"""
+    key = (config.name, issue_number)
+    if key not in _posted_markers_cache:
+        # fallback for PRs that were not prefetched
+        markers = set()
+        for comment in fetch_issue_comments(config, issue_number):
+            markers.update(_MARKER_RE.findall(comment['body']))
+        _posted_markers_cache[key] = markers
+    return marker in _posted_markers_cache[key]
+
+
+def post_comment(config, issue_number, body):
+    path = f'repos/{config.name}/issues/{issue_number}/comments'
+    if requests is None:
+        subprocess.run(['gh', 'api', path, '-f', f'body={body}'],
+                       capture_output=True, text=True, check=True)
+    else:
+        response = _get_session().post(f'{API_ROOT}/{path}',
+                                       json={'body': body}, timeout=30)
+        response.raise_for_status()
+    # keep the cache current so a repeated trigger in the same sweep
+    # sees the reply we just posted
+    key = (config.name, issue_number)
+    if key in _posted_markers_cache:
+        _posted_markers_cache[key].update(_MARKER_RE.findall(body))
+
+
+def _post_reply(config, issue_number, text, marker):
+    """Post a bot reply with the shared marker/attribution footer"""
+    post_comment(config, issue_number,
+                 f'{text}\n\n{marker}\nTriggered via {SCRIPT_MARKDOWN_LINK}')
+
+
+def post_benchmark_queued(config, issue_number, benchmarks, marker):
+    _post_reply(config, issue_number,
+                f'Queued benchmarks: {", ".join(benchmarks)}. '
+                f'Results will be posted here when the run completes.',
+                marker)
+
+
+def post_benchmark_unknown(config, issue_number, unknown, marker):
+    _post_reply(config, issue_number,
+                f'Unknown benchmark name(s): {", ".join(unknown)}. '
+                f'Known benchmarks: {_ALL_BENCHMARKS_TEXT}',
+                marker)
+
+
+# basenames of files under jobs/, snapshotted once per sweep so dedupe
+# checks are set lookups instead of one stat syscall per trigger
+_existing_jobs = None
+
+
+def _job_exists(job_path):
+    global _existing_jobs
+    if _existing_jobs is None:
+        try:
+            _existing_jobs = set(os.listdir(JOBS_DIR))
+        except OSError:
+            _existing_jobs = set()
+    return os.path.basename(job_path) in _existing_jobs
+
+
+@functools.lru_cache(maxsize=None)
+def pr_number_from_url(url):
+    """PR number from a review comment's pull_request_url.
+
+    Cached because every review comment on the same PR repeats the url.
+    """
+    return int(url.rsplit('/', 1)[1])
+
+
+def job_marker(config, comment_id):
+    """Marker embedded in our replies to keep them idempotent per trigger.
+
+    A short content hash rather than the raw repo#comment string, so the
+    marker stays compact and opaque in the posted comment.
+    """
+    digest = hashlib.sha1(f'{config.name}#{comment_id}'.encode()).hexdigest()
+    return f'<!--bm:{digest[:12]}-->'
+
+
+def job_path_for(config, pr_number, comment_id):
+    return os.path.join(
+        JOBS_DIR,
+        f'{config.name.replace("/", "-")}-pr{pr_number}-{comment_id}.sh')
+
+
+def queue_job(config, pr_number, benchmarks, comment):
+    """Write a job script for the benchmark runner to pick up"""
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    job_path = job_path_for(config, pr_number, comment['id'])
+    if _job_exists(job_path):
+        return job_path
+    # O_EXCL creates-or-fails atomically, so if two sweeps (or a sweep
+    # and the webhook server) race on the same trigger, exactly one
+    # writes the job; an exists-check before open would leave a window
+    # where both see "missing"
+    try:
+        fd = os.open(job_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        return job_path
+    with os.fdopen(fd, 'w') as f:
+        f.write('#!/bin/bash\n')
+        f.write(f'# User: {(comment.get("user") or {}).get("login", "")}\n')
+        f.write(f'# Comment: {comment.get("html_url", "")}\n')
+        f.write(f'REPO="{config.name}"\n')
+        f.write(f'PR_NUMBER="{pr_number}"\n')
+        f.write(f'BENCHMARKS="{" ".join(benchmarks)}"\n')
+        f.write('bash run_benchmark_job.sh "${REPO}" "${PR_NUMBER}" ${BENCHMARKS}\n')
+    if _existing_jobs is not None:
+        _existing_jobs.add(os.path.basename(job_path))
+    return job_path
+
+
+def list_job_files():
+    """Return pending job files, oldest first.
+
+    scandir serves is_file and the mtime from one stat per entry;
+    decorate-sort-undecorate avoids re-stating during comparisons.
+    """
+    try:
+        with os.scandir(JOBS_DIR) as it:
+            entries = [(entry.stat().st_mtime, entry.path) for entry in it
+                       if entry.name.endswith('.sh') and entry.is_file()]
+    except OSError:
+        return []
+    entries.sort()
+    return [path for _, path in entries]
+
+
+def parse_job_metadata(path):
+    """Extract the header fields from a queued job script.
+
+    One pass of the combined multiline regex over the whole (tiny)
+    file replaces the per-line prefix checks and searches, stopping
+    once all four fields are found.
+    """
+    metadata = {}
+    with open(path) as f:
+        content = f.read()
+    for m in _JOB_META_RE.finditer(content):
+        key = m.lastgroup
+        value = m.group(key)
+        metadata[key] = value.split() if key == 'benchmarks' else value.strip()
+        if len(metadata) == 4:
+            break
+    return metadata
+
+
+def format_queue():
+    """Render the queued jobs as one markdown body.
+
+    Only called when a comment asked for the queue, so the common sweep
+    never touches jobs/ at all. The body is assembled in a StringIO
+    rather than a list of line strings joined at the end.
+    """
+    files = list_job_files()
+    if not files:
+        return 'The benchmark queue is empty.'
+    # the per-file reads are independent and block on the filesystem, so a
+    # long queue is parsed concurrently; executor.map keeps the file order
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        metas = list(executor.map(parse_job_metadata, files))
+    buf = io.StringIO()
+    buf.write(f'{len(files)} queued benchmark job(s), oldest first:\n')
+    for meta in metas:
+        buf.write(f'- PR #{meta.get("pr_number", "?")}: '
+                  f'{" ".join(meta.get("benchmarks", []))} '
+                  f'(requested by {meta.get("user", "?")})\n')
+    return buf.getvalue()
+
+
+def process_queue_request(config, comment):
+    """Plan a reply with the current job queue.
+
+    Returns the planned reply as a list of no-arg callables (empty when
+    nothing needs posting) so the caller can overlap the HTTP POSTs.
+    """
+    pr_number = pr_number_from_url(comment['pull_request_url'])
+    marker = job_marker(config, comment['id'])
+    if already_posted(config, pr_number, marker):
+        return []
+    print(f'{config.name}#{pr_number}: posting queue listing')
+    return [functools.partial(_post_reply, config, pr_number,
+                              format_queue(), marker)]
+
+
+def process_comment(config, comment):
+    """Queue a job and plan a reply if `comment` is an authorized trigger.
+
+    The job file is written here (cheap, local, and the dedupe gate for
+    later sweeps); the reply POST is returned as a list of no-arg
+    callables so the caller can overlap replies across triggers.
+    """
+    if comment.get('author_association') not in ALLOWED_ASSOCIATIONS:
+        return []
+    kind, benchmarks = classify_body(comment.get('body', ''))
+    if kind != 'run':
+        return []
+
+    # review comments carry the PR url; the issue number equals the PR number
+    pr_number = pr_number_from_url(comment['pull_request_url'])
+    # the queued job file is the cheapest dedupe gate: if it exists, an
+    # earlier sweep handled this trigger and no comment check is needed
+    if _job_exists(job_path_for(config, pr_number, comment['id'])):
+        return []
+    marker = job_marker(config, comment['id'])
+    if already_posted(config, pr_number, marker):
+        return []
+
+    unknown = [b for b in benchmarks if b not in ALLOWED_BENCHMARKS]
+    if unknown:
+        print(f'{config.name}#{pr_number}: unknown benchmarks {unknown}')
+        return [functools.partial(post_benchmark_unknown, config, pr_number,
+                                  unknown, marker)]
+
+    job_path = queue_job(config, pr_number, benchmarks, comment)
+    print(f'{config.name}#{pr_number}: queued {benchmarks} -> {job_path}')
+    return [functools.partial(post_benchmark_queued, config, pr_number,
+                              benchmarks, marker)]
+
+
+def main():
+    configs = build_configs()
+    state = _load_state()
+    # the per-repo fetches just wait on the API, so overlap them; job
+    # creation and posting below stay sequential and single-writer
+    with ThreadPoolExecutor(max_workers=len(configs)) as executor:
+        fetched = list(zip(configs,
+                           executor.map(fetch_recent_review_comments, configs,
+                                        [state] * len(configs))))
+    for config, comments in fetched:
+        print(f'{config.name}: {len(comments)} recent review comments')
+        if comments:
+            entry = state.setdefault(config.name, {})
+            entry['last_seen'] = max(c['updated_at'] for c in comments)
+            # a full first page means newer comments may have pushed
+            # older ones out; recorded so operators can spot it
+            entry['last_full_page'] = len(comments) >= PER_PAGE
+        # one pass over the batch, classifying each body once
+        triggers = []
+        queue_requests = []
+        for comment in comments:
+            if comment.get('author_association') not in ALLOWED_ASSOCIATIONS:
+                continue
+            kind, _ = classify_body(comment.get('body') or '')
+            if kind == 'run':
+                triggers.append(comment)
+            elif kind == 'queue':
+                queue_requests.append(comment)
+        # triggers whose job file already exists need no comment lookup
+        pending_prs = set()
+        for comment in triggers:
+            pr = pr_number_from_url(comment['pull_request_url'])
+            if not _job_exists(job_path_for(config, pr, comment['id'])):
+                pending_prs.add(pr)
+        pending_prs.update(pr_number_from_url(comment['pull_request_url'])
+                           for comment in queue_requests)
+        prefetch_issue_comment_bodies(config, pending_prs)
+        # plan first, post after: jobs are queued and dedupe decided
+        # serially, then the independent reply POSTs overlap so ten
+        # replies cost one round trip of latency instead of ten
+        replies = []
+        for comment in triggers:
+            replies += process_comment(config, comment)
+        for comment in queue_requests:
+            replies += process_queue_request(config, comment)
+        if replies:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                for future in [executor.submit(reply) for reply in replies]:
+                    future.result()
+    _save_state(state)
+
+
+if __name__ == '__main__':
+    main()
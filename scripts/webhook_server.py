@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+##
+# Event-driven alternative to running scrape_comments.py from cron: a small
+# webhook receiver that handles GitHub comment events as they happen, so a
+# "run benchmarks" comment is picked up in seconds instead of on the next
+# polling sweep, and quiet hours cost no API quota at all.
+#
+# Register an issue_comment + pull_request_review_comment webhook on each
+# configured repo pointing at http://<host>:<port>/webhook, with the shared
+# secret exported here as WEBHOOK_SECRET. One polling sweep still runs at
+# startup to catch anything delivered while the server was down.
+##
+
+import argparse
+import hashlib
+import hmac
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import scrape_comments
+
+WEBHOOK_PATH = '/webhook'
+
+_SECRET = os.environ.get('WEBHOOK_SECRET', '').encode()
+
+# repo full_name -> RepoConfig; events from other repos are ignored
+_CONFIGS = {config.name: config for config in scrape_comments.build_configs()}
+
+# comment actions worth processing; edits count because a typo'd trigger
+# is usually fixed by editing the comment
+_ACTIONS = frozenset({'created', 'edited'})
+
+
+def _verify_signature(body, signature):
+    """Check the X-Hub-Signature-256 HMAC against WEBHOOK_SECRET"""
+    if not signature:
+        return False
+    expected = 'sha256=' + hmac.new(_SECRET, body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def handle_event(event, payload):
+    """Feed one webhook delivery through the scrape_comments pipeline.
+
+    Both event types are normalized to the review-comment dict shape that
+    process_comment already reads; issue comments on PRs just need
+    pull_request_url filled in from the issue payload.
+    """
+    config = _CONFIGS.get(payload.get('repository', {}).get('full_name'))
+    if config is None or payload.get('action') not in _ACTIONS:
+        return
+    if event == 'pull_request_review_comment':
+        comment = payload['comment']
+    elif event == 'issue_comment' and 'pull_request' in payload.get('issue', {}):
+        comment = dict(payload['comment'])
+        comment['pull_request_url'] = payload['issue']['pull_request']['url']
+    else:
+        return
+    kind, _ = scrape_comments.classify_body(comment.get('body') or '')
+    if kind == 'queue':
+        if comment.get('author_association') in scrape_comments.ALLOWED_ASSOCIATIONS:
+            replies = scrape_comments.process_queue_request(config, comment)
+        else:
+            replies = []
+    else:
+        replies = scrape_comments.process_comment(config, comment)
+    # a single delivery plans at most one reply; post it inline
+    for reply in replies:
+        reply()
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        if self.path != WEBHOOK_PATH:
+            self.send_error(404)
+            return
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if not _verify_signature(body, self.headers.get('X-Hub-Signature-256')):
+            self.send_error(401)
+            return
+        try:
+            handle_event(self.headers.get('X-GitHub-Event'),
+                         scrape_comments._json_loads(body))
+        except Exception as exc:  # keep serving; GitHub retries on 5xx
+            print(f'Error handling delivery: {exc}')
+            self.send_error(500)
+            return
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        # per-delivery request lines are noise under a busy repo; the
+        # interesting events are printed by scrape_comments itself
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Webhook receiver for benchmark trigger comments')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='Address to listen on')
+    parser.add_argument('--port', type=int, default=8080,
+                        help='Port to listen on')
+    args = parser.parse_args()
+
+    if not _SECRET:
+        raise SystemExit('WEBHOOK_SECRET is not set')
+
+    # catch up on anything posted while the server was down
+    scrape_comments.main()
+
+    print(f'Listening on {args.host}:{args.port}{WEBHOOK_PATH}')
+    ThreadingHTTPServer((args.host, args.port), WebhookHandler).serve_forever()
+
+
+if __name__ == '__main__':
+    main()